@@ -1,11 +1,56 @@
+import functools
+import json
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
 
 class Settings(BaseSettings):
     API_KEY: str = "mock_api_key"  # Default for testing
     API_BASE_URL: str = "https://wealthfolio.labruntipi.io/api/v1"
     asset_filters: Optional[str] = None  # JSON string from env, parsed as needed
+    REDIS_URL: Optional[str] = None  # Shared cache across workers/replicas when set
+    REDIS_TIMEOUT: float = 0.5  # Connect/socket timeout; a slow Redis degrades to a miss
+    PORTFOLIO_CACHE_TTL: int = 30
+    # Seconds between background refreshes of the default /portfolio response; 0 disables
+    PORTFOLIO_REFRESH_INTERVAL: float = 20.0
+
+    # Shared HTTP client tuning for upstream Wealthfolio calls
+    HTTP2: bool = True
+    HTTP_MAX_CONNECTIONS: int = 10
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_CONNECT_TIMEOUT: float = 2.0
+    HTTP_READ_TIMEOUT: float = 5.0
+    HTTP_WRITE_TIMEOUT: float = 5.0
+    HTTP_POOL_TIMEOUT: float = 1.0
+    # Upstream requests allowed in flight per worker; extra callers queue for a slot.
+    # Unset means HTTP_MAX_CONNECTIONS; see upstream_concurrency
+    MAX_UPSTREAM_CONCURRENCY: Optional[int] = None
+    # Concurrent /holdings/item lookups when the bulk holdings endpoint is unavailable
+    HOLDINGS_FALLBACK_CONCURRENCY: int = 8
 
     model_config = {"env_file": ".env"}
 
+    @property
+    def upstream_concurrency(self) -> int:
+        """Effective upstream request limit per worker
+
+        Only HTTP/2 (which httpx negotiates over https) multiplexes several requests on a
+        connection; otherwise the limit is capped at HTTP_MAX_CONNECTIONS so queued callers
+        wait on the limit instead of hitting HTTP_POOL_TIMEOUT in the pool.
+        """
+        limit = self.MAX_UPSTREAM_CONCURRENCY or self.HTTP_MAX_CONNECTIONS
+        if not (self.HTTP2 and self.API_BASE_URL.startswith("https://")):
+            limit = min(limit, self.HTTP_MAX_CONNECTIONS)
+        return limit
+
+    @functools.cached_property
+    def asset_filters_list(self) -> List[str]:
+        """asset_filters parsed once: a JSON list or a comma-separated string"""
+        if not self.asset_filters:
+            return []
+        value = self.asset_filters.strip()
+        if value.startswith("["):
+            return json.loads(value)
+        return [item.strip() for item in value.split(",") if item.strip()]
+
 settings = Settings()
\ No newline at end of file
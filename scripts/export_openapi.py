@@ -0,0 +1,17 @@
+"""Export the server's OpenAPI schema to src/openapi.json
+
+Run from the repository root (``python -m scripts.export_openapi``) at build time so the
+server can load the finished schema from disk instead of generating it on startup.
+"""
+import orjson
+
+from src.mcp_server import OPENAPI_SCHEMA_FILE, build_openapi_schema
+
+
+def main() -> None:
+    OPENAPI_SCHEMA_FILE.write_bytes(orjson.dumps(build_openapi_schema(), option=orjson.OPT_INDENT_2))
+    print(f"Wrote {OPENAPI_SCHEMA_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,58 +1,362 @@
 import httpx
 import asyncio
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
+import functools
+import logging
+import sys
+import time
+import numpy as np
+import orjson
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Dict, Any, FrozenSet, NamedTuple, Optional, Tuple, Union
+from datetime import date, datetime, timedelta
 from config.settings import settings
+from src.cache import RedisCache, TTLCache, cached
+
+logger = logging.getLogger(__name__)
+
+# Anything httpx accepts as query params: a dict, prebuilt QueryParams or (key, value) pairs
+RequestParams = Union[Dict[str, Any], httpx.QueryParams, Tuple[Tuple[str, str], ...]]
+
+# Every call targets one host, so a small pool suffices: HTTP/2 multiplexes the
+# fan-out as concurrent streams (bounded by the server's SETTINGS_MAX_CONCURRENT_STREAMS).
+_LIMITS = httpx.Limits(
+    max_connections=settings.HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+)
+# A short pool timeout stops a stalled upstream from queueing requests indefinitely
+_TIMEOUT = httpx.Timeout(
+    connect=settings.HTTP_CONNECT_TIMEOUT,
+    read=settings.HTTP_READ_TIMEOUT,
+    write=settings.HTTP_WRITE_TIMEOUT,
+    pool=settings.HTTP_POOL_TIMEOUT,
+)
+
+# Seconds each kind of Wealthfolio response stays cached
+CACHE_TTLS: Dict[str, float] = {
+    "accounts": 300,
+    "assets": 600,
+    "valuation_history": 60,
+    "valuations": 15,
+    "portfolio": settings.PORTFOLIO_CACHE_TTL,
+}
+_PORTFOLIO_CACHE_SIZE = 128
+# Cached method results; arguments such as history ranges and account ID lists come from
+# callers, so the cache is bounded rather than left to grow with every distinct call
+_RESPONSE_CACHE_SIZE = 256
+
+# Asset types without per-asset holdings, skipped by the holdings fallback
+_NON_TRADABLE = frozenset({"CASH", "FOREX"})
+
+# Distinct account sets whose /valuations/latest params are kept prebuilt
+_VALUATION_PARAMS_CACHE_SIZE = 64
+_HOLDING_ITEM_CACHE_SIZE = 1024
+_HOLDING_ITEM_TTL = 30
+_HOLDING_ITEM_MISS_TTL = 10
+
+
+def _holding_item_ttl(item: Optional[Dict[str, Any]]) -> float:
+    """Cache found holdings longer than 404 misses"""
+    return _HOLDING_ITEM_TTL if item is not None else _HOLDING_ITEM_MISS_TTL
+
+
+def _portfolio_ttl(data: Dict[str, Any]) -> float:
+    """Don't cache a portfolio assembled from partially failed upstream calls"""
+    return 0 if data.get("errors") else CACHE_TTLS["portfolio"]
+
+
+def _settle(results: List[Any], names: Tuple[str, ...], errors: List[str]) -> List[Any]:
+    """Replace failed gather results with empty sections, recording which ones failed"""
+    settled = []
+    for name, result in zip(names, results):
+        if isinstance(result, BaseException):
+            if not isinstance(result, Exception):
+                raise result
+            logger.warning("Failed to fetch %s: %s", name, result)
+            errors.append(name)
+            result = []
+        settled.append(result)
+    return settled
+
+
+# Short fields repeated across many rows; interned so every row shares one str object
+_VALUATION_INTERN_FIELDS = ("accountId", "currency")
+_ASSET_INTERN_FIELDS = ("id", "type")
+
+
+def _intern_fields(rows: Any, fields: Tuple[str, ...]) -> Any:
+    """Intern the given string fields of each row in place; non-list bodies pass through"""
+    if not isinstance(rows, list):
+        return rows
+    intern = sys.intern
+    for row in rows:
+        if not isinstance(row, dict):
+            continue
+        for field in fields:
+            value = row.get(field)
+            if type(value) is str:
+                row[field] = intern(value)
+    return rows
+
+
+# Applied by @cached to every load (upstream or Redis hit) before it is cached in-process
+_intern_valuations = functools.partial(_intern_fields, fields=_VALUATION_INTERN_FIELDS)
+_intern_assets = functools.partial(_intern_fields, fields=_ASSET_INTERN_FIELDS)
+
+
+# Below this many valuations the plain Python loop beats building NumPy arrays
+# (and the reduction is too cheap to be worth a hop to a worker thread)
+_NUMPY_TOTALS_THRESHOLD = 1000
+
+_STREAM_CHUNK_SIZE = 64 * 1024
+
+# Minimum seconds between checks of the shared generation, so a /sync handled by another
+# worker is noticed within this delay without a Redis round trip on every cached call
+_GENERATION_CHECK_INTERVAL = 1.0
+
+# Account IDs are cached briefly so warm /portfolio calls can fan out in one round trip
+_ACCOUNT_IDS_KEY = "account_ids"
+_ACCOUNT_IDS_TTL = 60
+
+
+class Totals(NamedTuple):
+    """Portfolio-wide sums reduced from the latest valuations"""
+    value: float
+    cost: float
+    contribution: float
+
+
+def _compute_totals(valuations: List[Dict[str, Any]]) -> Totals:
+    """Sum value, cost basis and net contribution in a single pass over valuations"""
+    if len(valuations) >= _NUMPY_TOTALS_THRESHOLD:
+        return _compute_totals_numpy(valuations)
+    total_value = total_cost = total_contribution = 0.0
+    for v in valuations:
+        total_value += v.get("totalValue", 0) or 0
+        total_cost += v.get("costBasis", 0) or 0
+        total_contribution += v.get("netContribution", 0) or 0
+    return Totals(total_value, total_cost, total_contribution)
+
+
+def _compute_totals_numpy(valuations: List[Dict[str, Any]]) -> Totals:
+    """Project each field into a float64 column and reduce with NumPy's pairwise sum"""
+    count = len(valuations)
+    columns = [
+        np.fromiter((v.get(field, 0.0) or 0.0 for v in valuations), dtype=np.float64, count=count)
+        for field in ("totalValue", "costBasis", "netContribution")
+    ]
+    return Totals(*(float(column.sum()) for column in columns))
+
+
+def _build_summary(totals: Totals) -> Dict[str, float]:
+    """Derive gain/loss figures from the reduced totals"""
+    total_gain_loss = totals.value - totals.cost
+    return {
+        "total_value": totals.value,
+        "total_cost": totals.cost,
+        "total_contribution": totals.contribution,
+        "total_gain_loss": total_gain_loss,
+        "total_gain_loss_percent": (total_gain_loss / totals.cost * 100.0) if totals.cost > 0 else 0.0
+    }
+
+
+# Last (today, account_id, days) -> params built by _history_params; stable for the whole day
+_history_params_cache: Optional[Tuple[Tuple[date, str, int], Dict[str, str]]] = None
+
+
+def _history_params(account_id: str, days: int) -> Dict[str, str]:
+    """Build /valuations/history query params, reusing them while the date is unchanged"""
+    global _history_params_cache
+    end_date = datetime.now().date()
+    key = (end_date, account_id, days)
+    if _history_params_cache is not None and _history_params_cache[0] == key:
+        return _history_params_cache[1]
+
+    start_date = end_date - timedelta(days=days)
+    params = {
+        "accountId": account_id,
+        "startDate": start_date.isoformat(),
+        "endDate": end_date.isoformat()
+    }
+    _history_params_cache = (key, params)
+    return params
+
 
 class WealthfolioClient:
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.base_url = settings.API_BASE_URL
+        # Shared pooled client so keep-alive connections are reused across calls.
+        # HTTP/2 lets the concurrent portfolio fan-out multiplex over one connection.
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            http2=settings.HTTP2,
+            timeout=_TIMEOUT,
+            limits=_LIMITS,
+        )
+        # Queue surges here rather than piling onto the pool and hitting pool timeouts
+        self._upstream_limit = settings.upstream_concurrency
+        self._upstream_slots = asyncio.Semaphore(self._upstream_limit)
+        self._upstream_in_flight = 0
+        # Short-lived cache for slow-changing endpoints
+        self._cache = TTLCache(maxsize=_RESPONSE_CACHE_SIZE)
+        # LRU of (account_id, asset_id) lookups; also remembers 404s to absorb repeat probes
+        self._holding_items = TTLCache(maxsize=_HOLDING_ITEM_CACHE_SIZE)
+        # Aggregated /portfolio results; concurrent identical misses share one upstream fetch
+        self._portfolio_cache = TTLCache(maxsize=_PORTFOLIO_CACHE_SIZE)
+        # cache_key -> (ETag, parsed body) for conditional GETs
+        self._etags: Dict[str, Tuple[str, Any]] = {}
+        self._valuation_params: Dict[FrozenSet[str], httpx.QueryParams] = {}
+        # (assets list, its tradable asset IDs) for the holdings fallback
+        self._tradable_ids: Optional[Tuple[List[Dict[str, Any]], List[str]]] = None
+        # Optional cache shared between workers/replicas, attached at startup
+        self.shared_cache: Optional[RedisCache] = None
+        # Shared cache generation the in-process caches were last synced to
+        self._shared_generation: Optional[int] = None
+        self._generation_checked_at = float("-inf")
+        # Default /portfolio response kept current by refresh_portfolio(); None when unavailable
+        self.warm_portfolio: Optional[Dict[str, Any]] = None
+        # time.monotonic() when warm_portfolio was last published
+        self.warm_portfolio_at = 0.0
 
-    async def _make_request(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """Make HTTP request to Wealthfolio API"""
-        url = f"{self.base_url}{endpoint}"
+    @property
+    def upstream_slots_available(self) -> int:
+        """Upstream request slots currently free (0 means callers are queueing)"""
+        return self._upstream_limit - self._upstream_in_flight
 
-        async with httpx.AsyncClient() as client:
+    @asynccontextmanager
+    async def _upstream_slot(self) -> AsyncIterator[None]:
+        """Hold one upstream request slot, counting it as in flight"""
+        async with self._upstream_slots:
+            self._upstream_in_flight += 1
             try:
-                response = await client.get(url, params=params)
+                yield
+            finally:
+                self._upstream_in_flight -= 1
+
+    async def aclose(self) -> None:
+        """Close the underlying HTTP connection pool"""
+        await self._client.aclose()
+
+    async def invalidate_cache(self) -> None:
+        """Drop all cached Wealthfolio responses, including the shared Redis cache
+
+        Other workers drop their in-process caches on their next sync_shared_cache().
+        """
+        self._clear_local_caches()
+        if self.shared_cache is not None:
+            generation = await self.shared_cache.invalidate()
+            if generation is not None:
+                self._shared_generation = generation
+
+    async def sync_shared_cache(self) -> None:
+        """Drop in-process caches if the shared cache was invalidated since the last check
+
+        Checks at most once per _GENERATION_CHECK_INTERVAL; calls in between return at once.
+        """
+        if self.shared_cache is None:
+            return
+        now = time.monotonic()
+        if now - self._generation_checked_at < _GENERATION_CHECK_INTERVAL:
+            return
+        # Stamped before awaiting so concurrent callers don't all query Redis
+        self._generation_checked_at = now
+        generation = await self.shared_cache.generation()
+        if generation is None or generation == self._shared_generation:
+            return
+        # The first observation only records the generation: nothing cached locally can
+        # predate it, and clearing would discard loads (e.g. the first refresh) in flight
+        if self._shared_generation is not None:
+            self._clear_local_caches()
+        self._shared_generation = generation
+
+    def _clear_local_caches(self) -> None:
+        """Drop this worker's in-process caches and ignore loads already in flight"""
+        self._cache.invalidate()
+        self._holding_items.invalidate()
+        self._portfolio_cache.invalidate()
+        self._etags.clear()
+        self.warm_portfolio = None
+
+    async def _make_request(
+        self, endpoint: str, params: Optional[RequestParams] = None, cache_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Make HTTP request to Wealthfolio API
+
+        With a cache_key, the response ETag is remembered and sent back as If-None-Match,
+        so an unchanged resource costs a 304 instead of a full body.
+        """
+        cached_entry = self._etags.get(cache_key) if cache_key else None
+        headers = {"If-None-Match": cached_entry[0]} if cached_entry else None
+        try:
+            # Stream the body into one growing buffer instead of holding chunks and a joined copy
+            async with self._upstream_slot(), \
+                    self._client.stream("GET", endpoint, params=params, headers=headers) as response:
+                if response.status_code == 304 and cached_entry:
+                    return cached_entry[1]
+                # Any non-2xx (errors, redirects, an unexpected 304) is raised below, and its
+                # handler logs the body, so read it while the stream is still open
+                if not response.is_success:
+                    await response.aread()
                 response.raise_for_status()
-                return response.json()
-            except httpx.HTTPStatusError as e:
-                print(f"HTTP error: {e.response.status_code} - {e.response.text}")
-                raise
-            except Exception as e:
-                print(f"Error fetching data: {e}")
-                raise
+                body = bytearray()
+                async for chunk in response.aiter_bytes(_STREAM_CHUNK_SIZE):
+                    body += chunk
+                etag = response.headers.get("ETag")
+            data = orjson.loads(body)
+            if cache_key and etag:
+                self._etags[cache_key] = (etag, data)
+            return data
+        except httpx.HTTPStatusError as e:
+            logger.error("HTTP error: %s - %s", e.response.status_code, e.response.text)
+            raise
+        except Exception as e:
+            logger.error("Error fetching data: %s", e)
+            raise
 
+    @cached(ttl=CACHE_TTLS["accounts"])
     async def get_accounts(self) -> List[Dict[str, Any]]:
         """Get all accounts"""
-        return await self._make_request("/accounts")
+        return await self._make_request("/accounts", cache_key="accounts")
 
+    @cached(ttl=CACHE_TTLS["valuations"], transform=_intern_valuations)
     async def get_latest_valuations(self, account_ids: List[str]) -> List[Dict[str, Any]]:
         """Get latest valuations for specified accounts"""
-        params = {"accountIds[]": account_ids}
+        if not isinstance(account_ids, list):
+            raise TypeError("account_ids must be a list of account IDs")
+        # Encoded as repeated accountIds[] query params, sorted so the URL is stable, and
+        # reused for the same set of accounts in any order without re-sorting
+        key = frozenset(account_ids)
+        params = self._valuation_params.get(key)
+        if params is None:
+            if len(self._valuation_params) >= _VALUATION_PARAMS_CACHE_SIZE:
+                self._valuation_params.clear()
+            params = httpx.QueryParams({"accountIds[]": sorted(key)})
+            self._valuation_params[key] = params
         return await self._make_request("/valuations/latest", params)
 
+    @cached(ttl=CACHE_TTLS["assets"], transform=_intern_assets)
     async def get_assets(self) -> List[Dict[str, Any]]:
         """Get all assets"""
-        return await self._make_request("/assets")
+        return await self._make_request("/assets", cache_key="assets")
 
+    @cached(ttl=CACHE_TTLS["valuation_history"], transform=_intern_valuations)
     async def get_valuation_history(self, account_id: str = "TOTAL", days: int = 30) -> List[Dict[str, Any]]:
         """Get historical valuations"""
-        end_date = datetime.now().date()
-        start_date = end_date - timedelta(days=days)
-
-        params = {
-            "accountId": account_id,
-            "startDate": start_date.isoformat(),
-            "endDate": end_date.isoformat()
-        }
+        params = _history_params(account_id, days)
         return await self._make_request("/valuations/history", params)
 
     async def get_holding_item(self, account_id: str, asset_id: str) -> Optional[Dict[str, Any]]:
         """Get specific holding item"""
-        params = {"accountId": account_id, "assetId": asset_id}
+        await self.sync_shared_cache()
+        # Concurrent lookups of the same pair await one in-flight request (404s included)
+        return await self._holding_items.get_or_load(
+            (account_id, asset_id), _holding_item_ttl, lambda: self._fetch_holding_item(account_id, asset_id)
+        )
+
+    async def _fetch_holding_item(self, account_id: str, asset_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch a holding item from Wealthfolio, returning None when it doesn't exist"""
+        params = (("accountId", account_id), ("assetId", asset_id))
         try:
             return await self._make_request("/holdings/item", params)
         except httpx.HTTPStatusError as e:
@@ -79,65 +383,54 @@ class WealthfolioClient:
         """Fallback method to fetch holdings individually if bulk endpoint unavailable"""
         # Get all assets first
         assets = await self.get_assets()
-        # Filter out non-investable assets (cash, forex)
-        investable_assets = [asset for asset in assets if asset.get("type") not in ["CASH", "FOREX"]]
-
-        tasks = []
-        for account_id in account_ids:
-            for asset in investable_assets:
-                tasks.append(self.get_holding_item(account_id, asset["id"]))
+        # IDs of investable assets (no cash, forex), rebuilt only when the asset list changes
+        if self._tradable_ids is None or self._tradable_ids[0] is not assets:
+            self._tradable_ids = (
+                assets, [asset["id"] for asset in assets if asset.get("type") not in _NON_TRADABLE]
+            )
+        tradable_ids = self._tradable_ids[1]
 
-        # Execute all requests concurrently
+        # Bound concurrency so the per-item fan-out doesn't flood the backend
+        semaphore = asyncio.Semaphore(settings.HOLDINGS_FALLBACK_CONCURRENCY)
+        tasks = [
+            self._bounded_fetch(semaphore, account_id, asset_id)
+            for account_id in account_ids
+            for asset_id in tradable_ids
+        ]
         results = await asyncio.gather(*tasks, return_exceptions=True)
 
         holdings = []
         for result in results:
-            if isinstance(result, dict) and result is not None:
+            if isinstance(result, Exception):
+                logger.warning("Failed to fetch holding item: %s", result)
+            elif isinstance(result, dict):
                 holdings.append(result)
 
         return holdings
 
+    async def _bounded_fetch(
+        self, semaphore: asyncio.Semaphore, account_id: str, asset_id: str
+    ) -> Optional[Dict[str, Any]]:
+        """Fetch one holding item while holding a slot of the fallback semaphore"""
+        async with semaphore:
+            return await self.get_holding_item(account_id, asset_id)
+
     async def fetch_portfolio_data(self, filters: dict) -> Dict[str, Any]:
         """Fetch comprehensive portfolio data with detailed holdings"""
-        try:
-            # Get accounts
-            accounts = await self.get_accounts()
+        await self.sync_shared_cache()
+        key = RedisCache.make_key("portfolio", filters)
 
-            # Get latest valuations for all accounts
-            account_ids = [acc["id"] for acc in accounts]
-
-            # Fetch data concurrently for better performance
-            valuations_task = self.get_latest_valuations(account_ids)
-            assets_task = self.get_assets()
-            history_task = self.get_valuation_history()
-            holdings_task = self.get_holdings(account_ids)
-
-            valuations, assets, history, holdings = await asyncio.gather(
-                valuations_task, assets_task, history_task, holdings_task
-            )
-
-            # Calculate totals
-            total_value = sum(v.get("totalValue", 0) for v in valuations)
-            total_cost = sum(v.get("costBasis", 0) for v in valuations)
-            total_contribution = sum(v.get("netContribution", 0) for v in valuations)
-
-            return {
-                "accounts": accounts,
-                "valuations": valuations,
-                "assets": assets,
-                "history": history,
-                "holdings": holdings,  # New field for detailed holdings
-                "summary": {
-                    "total_value": total_value,
-                    "total_cost": total_cost,
-                    "total_contribution": total_contribution,
-                    "total_gain_loss": total_value - total_cost,
-                    "total_gain_loss_percent": ((total_value - total_cost) / total_cost * 100) if total_cost > 0 else 0
-                }
-            }
+        async def load() -> Dict[str, Any]:
+            if self.shared_cache is not None:
+                return await self.shared_cache.get_or_load(
+                    key, _portfolio_ttl, lambda: self._fetch_portfolio_data(filters)
+                )
+            return await self._fetch_portfolio_data(filters)
 
+        try:
+            return await self._portfolio_cache.get_or_load(key, _portfolio_ttl, load)
         except Exception as e:
-            print(f"Error fetching portfolio data: {e}")
+            logger.error("Error fetching portfolio data: %s", e)
             # Return mock data for testing with empty holdings
             return {
                 "accounts": [],
@@ -145,6 +438,7 @@ class WealthfolioClient:
                 "assets": [],
                 "history": [],
                 "holdings": [],  # Include empty holdings for consistency
+                "errors": ["portfolio"],
                 "summary": {
                     "total_value": 0,
                     "total_cost": 0,
@@ -152,4 +446,98 @@ class WealthfolioClient:
                     "total_gain_loss": 0,
                     "total_gain_loss_percent": 0
                 }
-            }
\ No newline at end of file
+            }
+
+    def get_warm_portfolio(self, max_age: float) -> Optional[Dict[str, Any]]:
+        """Return warm_portfolio unless it is missing or was published over max_age seconds ago
+
+        A refresh that hangs (e.g. on a stalled upstream or Redis) stops publishing, so the
+        age check keeps its last copy from being served indefinitely.
+        """
+        if self.warm_portfolio is None or time.monotonic() - self.warm_portfolio_at > max_age:
+            return None
+        return self.warm_portfolio
+
+    async def refresh_portfolio(self, filters: dict, interval: float) -> None:
+        """Rebuild warm_portfolio for filters every interval seconds until cancelled"""
+        while True:
+            generation = self._portfolio_cache.generation
+            try:
+                data = await self._fetch_portfolio_data(filters)
+            except Exception as e:
+                logger.warning("Portfolio refresh failed: %s", e)
+                data = None
+            # Skip results that raced an invalidation; partial results go to the live path
+            if generation == self._portfolio_cache.generation:
+                self.warm_portfolio = data if data is not None and not data["errors"] else None
+                self.warm_portfolio_at = time.monotonic()
+            await asyncio.sleep(interval)
+
+    async def _fetch_portfolio_data(self, filters: dict) -> Dict[str, Any]:
+        """Fetch and aggregate portfolio data, raising on upstream errors"""
+        # Sub-calls other than /accounts degrade to empty sections instead of failing the whole call
+        errors: List[str] = []
+        cached_ids = self._cache.get(_ACCOUNT_IDS_KEY)
+        if cached_ids is None:
+            # Cold path: account IDs are needed before valuations and holdings
+            accounts = await self.get_accounts()
+            account_ids = [acc["id"] for acc in accounts]
+
+            # Fetch data concurrently for better performance
+            valuations, assets, history, holdings = _settle(
+                await asyncio.gather(
+                    self.get_latest_valuations(account_ids),
+                    self.get_assets(),
+                    self.get_valuation_history(),
+                    self.get_holdings(account_ids),
+                    return_exceptions=True,
+                ),
+                ("valuations", "assets", "history", "holdings"),
+                errors,
+            )
+        else:
+            # Warm path: fetch everything in one round trip using the cached account IDs
+            results = await asyncio.gather(
+                self.get_accounts(),
+                self.get_latest_valuations(cached_ids),
+                self.get_assets(),
+                self.get_valuation_history(),
+                self.get_holdings(cached_ids),
+                return_exceptions=True,
+            )
+            if isinstance(results[0], BaseException):
+                raise results[0]
+            accounts = results[0]
+            valuations, assets, history, holdings = _settle(
+                results[1:], ("valuations", "assets", "history", "holdings"), errors
+            )
+            account_ids = [acc["id"] for acc in accounts]
+            if account_ids != cached_ids:
+                # Accounts changed since the IDs were cached; refetch what depends on them
+                errors = [name for name in errors if name not in ("valuations", "holdings")]
+                valuations, holdings = _settle(
+                    await asyncio.gather(
+                        self.get_latest_valuations(account_ids),
+                        self.get_holdings(account_ids),
+                        return_exceptions=True,
+                    ),
+                    ("valuations", "holdings"),
+                    errors,
+                )
+        self._cache.set(_ACCOUNT_IDS_KEY, account_ids, _ACCOUNT_IDS_TTL)
+
+        # Calculate totals; large reductions run off the event loop
+        if len(valuations) >= _NUMPY_TOTALS_THRESHOLD:
+            totals = await asyncio.to_thread(_compute_totals, valuations)
+        else:
+            totals = _compute_totals(valuations)
+
+        return {
+            "accounts": accounts,
+            "valuations": valuations,
+            "assets": assets,
+            "history": history,
+            "holdings": holdings,  # New field for detailed holdings
+            "errors": errors,  # Sections that failed upstream and were returned empty
+            "summary": _build_summary(totals)
+        }
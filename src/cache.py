@@ -0,0 +1,254 @@
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, Union
+
+import orjson
+import redis.asyncio as redis
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class SingleFlight:
+    """Coalesce concurrent calls sharing a key into a single in-flight task"""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await fn() once per key; callers arriving while it runs share its result"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        # Shield so one caller being cancelled doesn't cancel the shared fetch
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+
+class TTLCache:
+    """Small in-process cache with per-entry expiry for async loaders
+
+    With maxsize set, the least recently used entry is evicted once the cache is full.
+    """
+
+    def __init__(self, maxsize: Optional[int] = None):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._flight = SingleFlight()
+        # Bumped on invalidation so loads started before it are not stored
+        self.generation = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        """Store value under key for ttl seconds"""
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        if self.maxsize is not None and len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        """Drop every entry and ignore results of loads already in flight"""
+        self.generation += 1
+        self._entries.clear()
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        ttl: Union[float, Callable[[Any], float]],
+        loader: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Return the cached value or await loader once, even with concurrent callers
+
+        ttl may be a callable taking the loaded value, e.g. to cache misses for less time;
+        a ttl of 0 returns the value without caching it.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        generation = self.generation
+
+        async def load() -> Any:
+            value = await loader()
+            seconds = ttl(value) if callable(ttl) else ttl
+            if generation == self.generation and seconds > 0:
+                self.set(key, value, seconds)
+            return value
+
+        return await self._flight.do((generation, key), load)
+
+
+class RedisCache:
+    """Cache-aside layer on Redis shared by all workers and replicas"""
+
+    def __init__(self, client: "redis.Redis", namespace: str = "wf", lock_ttl: int = 10, lock_wait: float = 5.0):
+        self.client = client
+        # Every key is stored under "<namespace>:<generation>:" so invalidate() can find them all
+        self.namespace = namespace
+        # Counter bumped by invalidate() so every worker notices and drops its in-process
+        # caches; kept outside "<namespace>:*" so invalidating doesn't reset it
+        self.generation_key = f"{namespace}.generation"
+        # Last generation seen; part of every key, so a load that started before an
+        # invalidation writes under the old generation, which nobody reads any more
+        self.current_generation = 0
+        self.lock_ttl = lock_ttl
+        self.lock_wait = lock_wait
+
+    @classmethod
+    def from_url(cls, url: str, timeout: float = 0.5) -> "RedisCache":
+        # Without socket timeouts a stalled Redis would hang every request awaiting it
+        return cls(redis.Redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout))
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    @staticmethod
+    def make_key(prefix: str, payload: Any) -> str:
+        """Build a key that is stable across processes (unlike the builtin hash())"""
+        digest = hashlib.blake2b(
+            json.dumps(payload, sort_keys=True, default=str).encode(), digest_size=16
+        ).hexdigest()
+        return f"{prefix}:{digest}"
+
+    async def invalidate(self) -> Optional[int]:
+        """Delete every key in this cache's namespace and bump the shared generation
+
+        Returns the new generation, or None if Redis is unavailable.
+        """
+        try:
+            keys = [key async for key in self.client.scan_iter(match=f"{self.namespace}:*")]
+            if keys:
+                await self.client.delete(*keys)
+            self.current_generation = await self.client.incr(self.generation_key)
+            return self.current_generation
+        except redis.RedisError as e:
+            logger.warning("Redis cache unavailable: %s", e)
+            return None
+
+    async def generation(self) -> Optional[int]:
+        """Return the shared generation (0 before any invalidation), or None if Redis is down"""
+        try:
+            value = await self.client.get(self.generation_key)
+        except redis.RedisError as e:
+            logger.warning("Redis cache unavailable: %s", e)
+            return None
+        self.current_generation = int(value or 0)
+        return self.current_generation
+
+    async def _get(self, key: str) -> Optional[Any]:
+        blob = await self.client.get(key)
+        return orjson.loads(blob) if blob is not None else None
+
+    async def get_or_load(
+        self, key: str, ttl: Union[int, Callable[[Any], int]], loader: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Return the cached value or load it, letting only one worker refresh a key at a time
+
+        As with TTLCache, ttl may be a callable of the loaded value; 0 skips storing it.
+        """
+        key = f"{self.namespace}:{self.current_generation}:{key}"
+        try:
+            value = await self._get(key)
+            if value is not None:
+                return value
+
+            lock_key = f"{key}:lock"
+            if not await self.client.set(lock_key, "1", nx=True, ex=self.lock_ttl):
+                # Another worker is loading this key; wait briefly for its result. If it
+                # releases the lock without storing one (its load failed or wasn't
+                # cacheable), stop waiting and load here
+                deadline = time.monotonic() + self.lock_wait
+                while time.monotonic() < deadline:
+                    await asyncio.sleep(0.05)
+                    value = await self._get(key)
+                    if value is not None:
+                        return value
+                    if not await self.client.exists(lock_key):
+                        break
+                return await loader()
+        except redis.RedisError as e:
+            logger.warning("Redis cache unavailable: %s", e)
+            return await loader()
+
+        try:
+            value = await loader()
+        except Exception:
+            await self._release(lock_key)
+            raise
+
+        seconds = int(ttl(value) if callable(ttl) else ttl)
+        try:
+            if seconds > 0:
+                await self.client.set(key, orjson.dumps(value), ex=seconds)
+            await self.client.delete(lock_key)
+        except redis.RedisError as e:
+            logger.warning("Redis cache unavailable: %s", e)
+        return value
+
+    async def _release(self, lock_key: str) -> None:
+        try:
+            await self.client.delete(lock_key)
+        except redis.RedisError as e:
+            logger.warning("Redis cache unavailable: %s", e)
+
+
+def cached(ttl: float, transform: Optional[Callable[[Any], Any]] = None):
+    """Cache an async WealthfolioClient method for ttl seconds
+
+    Results live in the instance's in-process `_cache` and, when the client has a
+    `shared_cache` attached, in Redis so other workers can reuse them. The client's
+    `sync_shared_cache()` runs first so a /sync handled by another worker is honoured.
+    transform, if given, is applied to each loaded value (fresh or from Redis) before
+    it enters the in-process cache.
+    """
+
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = tuple(
+                tuple(value) if isinstance(value, list) else value
+                for value in tuple(bound.arguments.values())[1:]
+            )
+
+            async def load():
+                if self.shared_cache is not None:
+                    value = await self.shared_cache.get_or_load(
+                        RedisCache.make_key(func.__name__, arguments), ttl, lambda: func(self, *args, **kwargs)
+                    )
+                else:
+                    value = await func(self, *args, **kwargs)
+                return transform(value) if transform is not None else value
+
+            await self.sync_shared_cache()
+            return await self._cache.get_or_load((func.__name__,) + arguments, ttl, load)
+
+        return wrapper
+
+    return decorator
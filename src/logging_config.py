@@ -0,0 +1,37 @@
+import logging
+import logging.handlers
+import queue
+import sys
+
+# Parent logger of every module under src/
+LOGGER_NAME = "src"
+
+
+def start_logging(level: int = logging.INFO) -> logging.handlers.QueueListener:
+    """Route src.* log records through a queue drained to stderr by a background thread
+
+    Emitting a record only enqueues it, so logging on the event loop never blocks on
+    stderr I/O.
+    """
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.setLevel(level)
+    logger.propagate = False
+
+    listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+def stop_logging(listener: logging.handlers.QueueListener) -> None:
+    """Flush queued records and detach the queue handler"""
+    listener.stop()
+    logger = logging.getLogger(LOGGER_NAME)
+    for handler in list(logger.handlers):
+        if isinstance(handler, logging.handlers.QueueHandler):
+            logger.removeHandler(handler)
+    logger.propagate = True
@@ -1,28 +1,97 @@
 import asyncio
-from fastapi import FastAPI, HTTPException, Query
+import hashlib
+import httpx
+import orjson
+from contextlib import asynccontextmanager, suppress
+from pathlib import Path
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html, get_swagger_ui_oauth2_redirect_html
 from fastapi.openapi.utils import get_openapi
 from src.api_client import WealthfolioClient
+from src.cache import RedisCache
+from src.logging_config import start_logging, stop_logging
 from config.settings import settings
 from typing import List, Dict, Any, Optional
 
+# Filters for the default /portfolio view, bound once; a tuple keeps them hashable
+DEFAULT_PORTFOLIO_FILTERS: Dict[str, Any] = {"assets": tuple(settings.asset_filters_list)}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the Wealthfolio client (and its connection pool) for the app's lifetime"""
+    log_listener = start_logging()
+    client = WealthfolioClient(api_key=settings.API_KEY)
+    if settings.REDIS_URL:
+        client.shared_cache = RedisCache.from_url(settings.REDIS_URL, timeout=settings.REDIS_TIMEOUT)
+        await client.sync_shared_cache()
+    app.state.client = client
+    refresh_task = None
+    if settings.PORTFOLIO_REFRESH_INTERVAL > 0:
+        refresh_task = asyncio.create_task(
+            client.refresh_portfolio(DEFAULT_PORTFOLIO_FILTERS, settings.PORTFOLIO_REFRESH_INTERVAL)
+        )
+    yield
+    if refresh_task is not None:
+        refresh_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await refresh_task
+    await client.aclose()
+    if client.shared_cache is not None:
+        await client.shared_cache.aclose()
+    stop_logging(log_listener)
+
+
+def orjson_response(data: Any, status_code: int = 200) -> Response:
+    """Serialize pass-through Wealthfolio data with orjson, skipping response-model validation"""
+    return Response(content=orjson.dumps(data), status_code=status_code, media_type="application/json")
+
+
 app = FastAPI(
     title="Wealthfolio MCP Server",
     description="Universal MCP Server for Wealthfolio Portfolio Management with OpenAPI Integration",
     version="1.0.0",
-    docs_url="/docs",
-    openapi_url="/openapi.json"
+    # /openapi.json and the docs UIs (/docs, /redoc) are registered below to serve the
+    # prebuilt schema bytes
+    docs_url=None,
+    redoc_url=None,
+    openapi_url=None,
+    lifespan=lifespan
 )
 
-client = WealthfolioClient(api_key=settings.API_KEY)
+# Portfolio payloads are large, repetitive JSON; level 4 trades a little ratio for CPU
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=4)
+
+
+# Upstream failures are mapped once here instead of in a catch-all around every endpoint;
+# anything else is a bug in this server and surfaces as FastAPI's plain 500
+@app.exception_handler(httpx.HTTPStatusError)
+async def upstream_status_error(request: Request, exc: httpx.HTTPStatusError) -> Response:
+    """Relay a Wealthfolio 4xx/5xx with a truncated copy of its body
+
+    Redirects and unexpected 304s also raise, but relaying them would send clients a
+    redirect without its Location or a 304 with a body, so they become a 502.
+    """
+    status_code = exc.response.status_code
+    if not exc.response.is_error:
+        return orjson_response({"detail": f"Unexpected upstream status {status_code}"}, status_code=502)
+    return orjson_response({"detail": exc.response.text[:200]}, status_code=status_code)
+
+
+@app.exception_handler(httpx.RequestError)
+async def upstream_request_error(request: Request, exc: httpx.RequestError) -> Response:
+    """Report Wealthfolio as unreachable (connection failures, timeouts)"""
+    return orjson_response({"detail": f"Upstream unreachable: {exc!r}"}, status_code=502)
 
 
 @app.get(
     "/accounts",
+    response_model=List[Dict[str, Any]],
     tags=["Portfolio Data"],
     summary="Get all accounts",
     responses={200: {"description": "List of all accounts from Wealthfolio API"}},
 )
-async def get_accounts() -> List[Dict[str, Any]]:
+async def get_accounts(request: Request) -> Response:
     """
     Fetch all accounts from Wealthfolio API.
     
@@ -31,19 +100,17 @@ async def get_accounts() -> List[Dict[str, Any]]:
     Returns:
         List of account dictionaries containing account details from Wealthfolio
     """
-    try:
-        return await client.get_accounts()
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching accounts: {str(e)}")
+    return orjson_response(await request.app.state.client.get_accounts())
 
 
 @app.get(
     "/valuations/latest",
+    response_model=List[Dict[str, Any]],
     tags=["Portfolio Data"],
     summary="Get latest valuations",
     responses={200: {"description": "Latest valuations for specified accounts"}},
 )
-async def get_latest_valuations(account_ids: List[str]) -> List[Dict[str, Any]]:
+async def get_latest_valuations(request: Request, account_ids: List[str]) -> Response:
     """
     Get latest valuations for specified accounts.
     
@@ -55,19 +122,17 @@ async def get_latest_valuations(account_ids: List[str]) -> List[Dict[str, Any]]:
     Returns:
         List of valuation dictionaries with current values from Wealthfolio API
     """
-    try:
-        return await client.get_latest_valuations(account_ids)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching valuations: {str(e)}")
+    return orjson_response(await request.app.state.client.get_latest_valuations(account_ids))
 
 
 @app.get(
     "/assets",
+    response_model=List[Dict[str, Any]],
     tags=["Portfolio Data"],
     summary="Get all assets",
     responses={200: {"description": "List of all assets from Wealthfolio"}},
 )
-async def get_assets() -> List[Dict[str, Any]]:
+async def get_assets(request: Request) -> Response:
     """
     Fetch all assets available in Wealthfolio.
     
@@ -76,22 +141,21 @@ async def get_assets() -> List[Dict[str, Any]]:
     Returns:
         List of asset dictionaries with asset information from Wealthfolio API
     """
-    try:
-        return await client.get_assets()
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching assets: {str(e)}")
+    return orjson_response(await request.app.state.client.get_assets())
 
 
 @app.get(
     "/valuations/history",
+    response_model=List[Dict[str, Any]],
     tags=["Portfolio Data"],
     summary="Get valuation history",
     responses={200: {"description": "Historical valuations for specified period"}},
 )
 async def get_valuation_history(
+    request: Request,
     account_id: str = "TOTAL",
     days: int = 30
-) -> List[Dict[str, Any]]:
+) -> Response:
     """
     Get historical valuations for a specified account and time period.
     
@@ -104,22 +168,21 @@ async def get_valuation_history(
     Returns:
         List of historical valuation dictionaries from Wealthfolio API
     """
-    try:
-        return await client.get_valuation_history(account_id=account_id, days=days)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching valuation history: {str(e)}")
+    return orjson_response(await request.app.state.client.get_valuation_history(account_id=account_id, days=days))
 
 
 @app.get(
     "/holdings/item",
+    response_model=Optional[Dict[str, Any]],
     tags=["Portfolio Data"],
     summary="Get specific holding item",
     responses={200: {"description": "Specific holding item details"}},
 )
 async def get_holding_item(
+    request: Request,
     account_id: str,
     asset_id: str
-) -> Optional[Dict[str, Any]]:
+) -> Response:
     """
     Get a specific holding item for an account and asset.
     
@@ -140,22 +203,20 @@ async def get_holding_item(
     Returns:
         Dictionary with holding item details from Wealthfolio API, or 404 error if not found
     """
-    try:
-        result = await client.get_holding_item(account_id=account_id, asset_id=asset_id)
-        if result is None:
-            raise HTTPException(status_code=404, detail="Holding item not found")
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching holding item: {str(e)}")
+    result = await request.app.state.client.get_holding_item(account_id=account_id, asset_id=asset_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Holding item not found")
+    return orjson_response(result)
 
 
 @app.get(
     "/holdings",
+    response_model=List[Dict[str, Any]],
     tags=["Portfolio Data"],
     summary="Get all holdings for specified accounts",
     responses={200: {"description": "List of all holdings across specified accounts"}},
 )
-async def get_holdings(account_ids: List[str] = Query(...)) -> List[Dict[str, Any]]:
+async def get_holdings(request: Request, account_ids: List[str] = Query(...)) -> Response:
     """
     Get all holdings for specified accounts.
 
@@ -170,19 +231,17 @@ async def get_holdings(account_ids: List[str] = Query(...)) -> List[Dict[str, An
     Returns:
         List of holding dictionaries with detailed position information
     """
-    try:
-        return await client.get_holdings(account_ids)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching holdings: {str(e)}")
+    return orjson_response(await request.app.state.client.get_holdings(account_ids))
 
 
 @app.get(
     "/portfolio",
+    response_model=Dict[str, Any],
     tags=["Portfolio Data"],
     summary="Get comprehensive portfolio data with detailed holdings",
     responses={200: {"description": "Complete portfolio information including detailed holdings"}},
 )
-async def get_portfolio() -> Dict[str, Any]:
+async def get_portfolio(request: Request) -> Response:
     """
     Fetch comprehensive portfolio data including all accounts, valuations, assets,
     historical data, and detailed holdings information.
@@ -202,14 +261,17 @@ async def get_portfolio() -> Dict[str, Any]:
         - assets: All available assets
         - history: Historical valuation data
         - holdings: Detailed holdings with quantities and costs (NEW)
+        - errors: Names of sections that failed upstream and were returned empty
         - summary: Calculated summary with totals, gains/losses, and percentages
     """
-    try:
-        filters = {"assets": settings.asset_filters}
-        data = await client.fetch_portfolio_data(filters=filters)
-        return data
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching portfolio data: {str(e)}")
+    client = request.app.state.client
+    await client.sync_shared_cache()
+    # The default view is refreshed in the background; fall back to a live fetch when
+    # that copy is missing or has missed more than one refresh
+    data = client.get_warm_portfolio(max_age=2 * settings.PORTFOLIO_REFRESH_INTERVAL)
+    if data is None:
+        data = await client.fetch_portfolio_data(filters=DEFAULT_PORTFOLIO_FILTERS)
+    return orjson_response(data)
 
 
 @app.post(
@@ -218,22 +280,58 @@ async def get_portfolio() -> Dict[str, Any]:
     summary="Trigger portfolio synchronization",
     responses={200: {"description": "Synchronization triggered successfully"}},
 )
-async def sync_portfolio() -> Dict[str, str]:
+async def sync_portfolio(request: Request) -> Dict[str, str]:
     """
-    Trigger portfolio synchronization (placeholder for future implementation).
+    Trigger portfolio synchronization.
     
-    This endpoint will be used to force a sync of portfolio data with external sources.
+    Invalidates cached Wealthfolio responses in this worker and in the shared
+    Redis cache (when configured); other workers see the bumped Redis generation
+    and drop their in-process caches, so the next request fetches fresh data.
     
     Returns:
         Status message indicating synchronization was triggered
     """
+    await request.app.state.client.invalidate_cache()
     return {"message": "Synchronization triggered."}
 
 
-def custom_openapi():
-    if app.openapi_schema:
-        return app.openapi_schema
-    
+@app.get("/healthz", tags=["System"], include_in_schema=False)
+async def healthz(request: Request) -> Dict[str, Any]:
+    """Liveness check reporting how many upstream request slots are free in this worker"""
+    return {
+        "status": "ok",
+        "upstream_slots_available": request.app.state.client.upstream_slots_available,
+        "upstream_slots": settings.upstream_concurrency,
+    }
+
+
+# Static schema generated at image build time by scripts/export_openapi.py
+OPENAPI_SCHEMA_FILE = Path(__file__).with_name("openapi.json")
+
+# Extra OpenAPI parameter documentation, keyed by path and then parameter name
+OPENAPI_PARAMETER_OVERRIDES: Dict[str, Dict[str, Dict[str, Any]]] = {
+    "/holdings/item": {
+        "account_id": {
+            "description": "Account UUID (from GET /accounts -> id field). MUST be UUID, NOT account name. Example: '40d73b4b-a731-467c-ae5b-657bea8e52643'",
+            "example": "40d73b4b-a731-467c-ae5b-657bea8e52643",
+            "schema": {"type": "string", "format": "uuid", "pattern": "^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$"},
+        },
+        "asset_id": {
+            "description": "Asset ID/symbol (e.g., 'VHYL.GB', 'AAPL', 'BTC')",
+            "example": "VHYL.GB",
+        },
+    },
+    "/valuations/latest": {
+        "account_ids": {
+            "description": "List of account UUIDs (from GET /accounts -> id field). Must be UUIDs, NOT account names",
+            "example": ["40d73b4b-a731-467c-ae5b-657bea8e52643"],
+        },
+    },
+}
+
+
+def build_openapi_schema() -> Dict[str, Any]:
+    """Generate the enhanced OpenAPI schema from the registered routes"""
     openapi_schema = get_openapi(
         title="Wealthfolio MCP Server",
         version="1.0.0",
@@ -273,35 +371,60 @@ This server is designed to work seamlessly with:
         "url": "https://wealthfolio.io/assets/logo.png"
     }
     
-    # Enhance /holdings/item endpoint parameters with clear documentation
-    if "paths" in openapi_schema and "/holdings/item" in openapi_schema["paths"]:
-        holdings_item_path = openapi_schema["paths"]["/holdings/item"]
-        if "get" in holdings_item_path:
-            holdings_item_get = holdings_item_path["get"]
-            # Update parameter descriptions to make it clear UUID should be used
-            if "parameters" in holdings_item_get:
-                for param in holdings_item_get["parameters"]:
-                    if param["name"] == "account_id":
-                        param["description"] = "Account UUID (from GET /accounts -> id field). MUST be UUID, NOT account name. Example: '40d73b4b-a731-467c-ae5b-657bea8e52643'"
-                        param["example"] = "40d73b4b-a731-467c-ae5b-657bea8e52643"
-                        param["schema"] = {"type": "string", "format": "uuid", "pattern": "^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$"}
-                    elif param["name"] == "asset_id":
-                        param["description"] = "Asset ID/symbol (e.g., 'VHYL.GB', 'AAPL', 'BTC')"
-                        param["example"] = "VHYL.GB"
-    
-    # Also enhance /valuations/latest endpoint to clarify account IDs
-    if "paths" in openapi_schema and "/valuations/latest" in openapi_schema["paths"]:
-        valuations_path = openapi_schema["paths"]["/valuations/latest"]
-        if "get" in valuations_path:
-            valuations_get = valuations_path["get"]
-            if "parameters" in valuations_get:
-                for param in valuations_get["parameters"]:
-                    if param["name"] == "account_ids":
-                        param["description"] = "List of account UUIDs (from GET /accounts -> id field). Must be UUIDs, NOT account names"
-                        param["example"] = ["40d73b4b-a731-467c-ae5b-657bea8e52643"]
+    # Enhance endpoint parameters with clear documentation (UUIDs, not account names)
+    for path, overrides in OPENAPI_PARAMETER_OVERRIDES.items():
+        operation = openapi_schema.get("paths", {}).get(path, {}).get("get", {})
+        for param in operation.get("parameters", []):
+            param.update(overrides.get(param["name"], {}))
     
-    app.openapi_schema = openapi_schema
+    return openapi_schema
+
+
+def custom_openapi():
+    # FastAPI's default app.openapi() regenerates when it thinks routes changed;
+    # the schema here is fixed at import, so always serve the prebuilt one
     return app.openapi_schema
 
 
-app.openapi = custom_openapi
\ No newline at end of file
+app.openapi = custom_openapi
+# Prefer the schema exported at build time (scripts/export_openapi.py); otherwise
+# build it once at import so no request pays for route introspection
+if OPENAPI_SCHEMA_FILE.exists():
+    app.openapi_schema = orjson.loads(OPENAPI_SCHEMA_FILE.read_bytes())
+else:
+    app.openapi_schema = build_openapi_schema()
+
+# Serialized once; every /openapi.json hit returns these bytes or a 304
+OPENAPI_BYTES = orjson.dumps(app.openapi_schema)
+OPENAPI_ETAG = f'"{hashlib.blake2b(OPENAPI_BYTES, digest_size=8).hexdigest()}"'
+
+
+@app.get("/openapi.json", include_in_schema=False)
+async def openapi_json(request: Request) -> Response:
+    """Serve the prebuilt schema with a long-lived Cache-Control and ETag revalidation"""
+    headers = {"Cache-Control": "public, max-age=3600", "ETag": OPENAPI_ETAG}
+    if request.headers.get("if-none-match") == OPENAPI_ETAG:
+        return Response(status_code=304, headers=headers)
+    return Response(content=OPENAPI_BYTES, media_type="application/json", headers=headers)
+
+
+@app.get("/docs", include_in_schema=False)
+async def swagger_ui() -> Response:
+    """Swagger UI backed by the prebuilt /openapi.json"""
+    return get_swagger_ui_html(
+        openapi_url="/openapi.json",
+        title=f"{app.title} - Swagger UI",
+        oauth2_redirect_url="/docs/oauth2-redirect",
+    )
+
+
+@app.get("/docs/oauth2-redirect", include_in_schema=False)
+async def swagger_ui_redirect() -> Response:
+    """OAuth2 redirect target used by Swagger UI's authorize flow"""
+    return get_swagger_ui_oauth2_redirect_html()
+
+
+@app.get("/redoc", include_in_schema=False)
+async def redoc() -> Response:
+    """ReDoc UI backed by the prebuilt /openapi.json"""
+    return get_redoc_html(openapi_url="/openapi.json", title=f"{app.title} - ReDoc")
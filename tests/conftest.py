@@ -0,0 +1,40 @@
+import fnmatch
+import pytest
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for the redis.asyncio commands used by RedisCache"""
+
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.store:
+            return None
+        self.store[key] = value.encode() if isinstance(value, str) else value
+        return True
+
+    async def exists(self, *keys):
+        return sum(key in self.store for key in keys)
+
+    async def incr(self, key):
+        self.store[key] = str(int(self.store.get(key, b"0")) + 1).encode()
+        return int(self.store[key])
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.store.pop(key, None)
+
+    async def scan_iter(self, match):
+        for key in list(self.store):
+            if fnmatch.fnmatch(key, match):
+                yield key
+
+
+@pytest.fixture
+def fake_redis():
+    """In-memory Redis double for RedisCache tests"""
+    return FakeRedis()
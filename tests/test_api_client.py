@@ -1,7 +1,11 @@
+import asyncio
 import pytest
 import httpx
 from unittest.mock import AsyncMock, patch
-from src.api_client import WealthfolioClient
+from datetime import date, timedelta
+from config.settings import settings
+from src.cache import RedisCache
+from src.api_client import _GENERATION_CHECK_INTERVAL, Totals, WealthfolioClient, _compute_totals, _compute_totals_numpy, _history_params, _intern_fields
 
 
 class TestWealthfolioClient:
@@ -30,7 +34,7 @@ class TestWealthfolioClient:
             result = await client.get_accounts()
 
             assert result == mock_response
-            mock_request.assert_called_once_with("/accounts")
+            mock_request.assert_called_once_with("/accounts", cache_key="accounts")
 
     @pytest.mark.asyncio
     async def test_get_latest_valuations_success(self, client):
@@ -50,7 +54,62 @@ class TestWealthfolioClient:
             result = await client.get_latest_valuations(account_ids)
 
             assert result == mock_response
-            mock_request.assert_called_once_with("/valuations/latest", {"accountIds[]": ["acc1", "acc2"]})
+            mock_request.assert_called_once_with(
+                "/valuations/latest", httpx.QueryParams({"accountIds[]": ["acc1", "acc2"]})
+            )
+
+    @pytest.mark.asyncio
+    async def test_get_latest_valuations_encodes_repeated_params(self, client):
+        """Test account IDs become repeated query params and the encoding is reused"""
+        seen = []
+
+        def handler(request):
+            seen.append(request.url.params.get_list("accountIds[]"))
+            return httpx.Response(200, json=[])
+
+        client._client = httpx.AsyncClient(
+            base_url=client.base_url, transport=httpx.MockTransport(handler)
+        )
+
+        await client.get_latest_valuations(["acc2", "acc1"])
+        await client.get_latest_valuations(["acc1", "acc2"])
+        await client.get_latest_valuations(["acc1", "acc2", "acc1"])
+
+        assert seen == [["acc1", "acc2"]] * 3
+        assert len(client._valuation_params) == 1
+
+    @pytest.mark.asyncio
+    async def test_make_request_bounds_upstream_concurrency(self, client):
+        """Test requests beyond the upstream limit queue instead of all hitting the pool"""
+        active = peak = 0
+        free_slots = []
+
+        async def handler(request):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            free_slots.append(client.upstream_slots_available)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return httpx.Response(200, json=[])
+
+        client._client = httpx.AsyncClient(
+            base_url=client.base_url, transport=httpx.MockTransport(handler)
+        )
+        client._upstream_limit = 2
+        client._upstream_slots = asyncio.Semaphore(2)
+
+        await asyncio.gather(*(client._make_request(f"/assets/{i}") for i in range(6)))
+
+        assert peak == 2
+        assert min(free_slots) == 0
+        assert client.upstream_slots_available == 2
+
+    @pytest.mark.asyncio
+    async def test_get_latest_valuations_rejects_non_list(self, client):
+        """Test a bare string is not silently treated as a list of characters"""
+        with pytest.raises(TypeError):
+            await client.get_latest_valuations("acc1")
 
     @pytest.mark.asyncio
     async def test_fetch_portfolio_data_success(self, client):
@@ -58,12 +117,14 @@ class TestWealthfolioClient:
         with patch.object(client, 'get_accounts', new_callable=AsyncMock) as mock_accounts, \
              patch.object(client, 'get_latest_valuations', new_callable=AsyncMock) as mock_valuations, \
              patch.object(client, 'get_assets', new_callable=AsyncMock) as mock_assets, \
-             patch.object(client, 'get_valuation_history', new_callable=AsyncMock) as mock_history:
+             patch.object(client, 'get_valuation_history', new_callable=AsyncMock) as mock_history, \
+             patch.object(client, 'get_holdings', new_callable=AsyncMock) as mock_holdings:
 
             mock_accounts.return_value = [{"id": "acc1", "name": "Test Account"}]
             mock_valuations.return_value = [{"accountId": "acc1", "totalValue": 10000.0, "costBasis": 9000.0, "netContribution": 8000.0}]
             mock_assets.return_value = [{"id": "AAPL", "name": "Apple Inc."}]
             mock_history.return_value = [{"date": "2025-12-14", "totalValue": 10000.0}]
+            mock_holdings.return_value = [{"accountId": "acc1", "assetId": "AAPL", "quantity": 10}]
 
             result = await client.fetch_portfolio_data({})
 
@@ -71,7 +132,10 @@ class TestWealthfolioClient:
             assert "valuations" in result
             assert "assets" in result
             assert "history" in result
+            assert result["holdings"] == mock_holdings.return_value
+            assert result["errors"] == []
             assert "summary" in result
+            mock_holdings.assert_awaited_once_with(["acc1"])
 
             # Check summary calculations
             summary = result["summary"]
@@ -81,6 +145,90 @@ class TestWealthfolioClient:
             assert summary["total_gain_loss"] == 1000.0
             assert summary["total_gain_loss_percent"] == pytest.approx(11.11, rel=1e-2)
 
+    @pytest.mark.asyncio
+    async def test_fetch_portfolio_data_uses_cached_account_ids(self, client):
+        """Test warm calls fan out with cached account IDs and refetch when they change"""
+        with patch.object(client, 'get_accounts', new_callable=AsyncMock) as mock_accounts, \
+             patch.object(client, 'get_latest_valuations', new_callable=AsyncMock) as mock_valuations, \
+             patch.object(client, 'get_assets', new_callable=AsyncMock) as mock_assets, \
+             patch.object(client, 'get_valuation_history', new_callable=AsyncMock) as mock_history, \
+             patch.object(client, 'get_holdings', new_callable=AsyncMock) as mock_holdings:
+
+            mock_accounts.return_value = [{"id": "acc1"}]
+            mock_valuations.return_value = []
+            mock_assets.return_value = []
+            mock_history.return_value = []
+            mock_holdings.return_value = []
+
+            await client.fetch_portfolio_data({})
+            client._portfolio_cache.invalidate()
+            await client.fetch_portfolio_data({})
+            assert mock_valuations.await_count == 2
+            mock_valuations.assert_awaited_with(["acc1"])
+
+            mock_accounts.return_value = [{"id": "acc1"}, {"id": "acc2"}]
+            client._portfolio_cache.invalidate()
+            await client.fetch_portfolio_data({})
+            assert mock_valuations.await_count == 4
+            mock_valuations.assert_awaited_with(["acc1", "acc2"])
+            mock_holdings.assert_awaited_with(["acc1", "acc2"])
+
+    @pytest.mark.asyncio
+    async def test_fetch_portfolio_data_coalesces_concurrent_calls(self, client):
+        """Test concurrent identical requests share a single upstream fetch"""
+        release = asyncio.Event()
+
+        async def slow_fetch(filters):
+            await release.wait()
+            return {"summary": {"total_value": 1.0}}
+
+        with patch.object(client, '_fetch_portfolio_data', side_effect=slow_fetch) as mock_fetch:
+            calls = [asyncio.ensure_future(client.fetch_portfolio_data({"assets": None})) for _ in range(5)]
+            await asyncio.sleep(0)
+            release.set()
+            results = await asyncio.gather(*calls)
+
+            assert mock_fetch.call_count == 1
+            assert all(result is results[0] for result in results)
+
+    @pytest.mark.asyncio
+    async def test_fetch_portfolio_data_cached_but_not_errors(self, client):
+        """Test successful results are cached and the empty error fallback is not"""
+        with patch.object(client, '_fetch_portfolio_data', new_callable=AsyncMock) as mock_fetch:
+            mock_fetch.side_effect = Exception("API Error")
+            await client.fetch_portfolio_data({})
+
+            mock_fetch.side_effect = None
+            mock_fetch.return_value = {"summary": {"total_value": 1.0}}
+            assert await client.fetch_portfolio_data({}) == {"summary": {"total_value": 1.0}}
+            assert await client.fetch_portfolio_data({}) == {"summary": {"total_value": 1.0}}
+
+            assert mock_fetch.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_fetch_portfolio_data_degrades_failed_sections(self, client):
+        """Test a failing sub-call yields an empty section and is not cached"""
+        with patch.object(client, 'get_accounts', new_callable=AsyncMock) as mock_accounts, \
+             patch.object(client, 'get_latest_valuations', new_callable=AsyncMock) as mock_valuations, \
+             patch.object(client, 'get_assets', new_callable=AsyncMock) as mock_assets, \
+             patch.object(client, 'get_valuation_history', new_callable=AsyncMock) as mock_history, \
+             patch.object(client, 'get_holdings', new_callable=AsyncMock) as mock_holdings:
+
+            mock_accounts.return_value = [{"id": "acc1"}]
+            mock_valuations.return_value = [{"accountId": "acc1", "totalValue": 100.0, "costBasis": 50.0}]
+            mock_assets.return_value = []
+            mock_history.side_effect = Exception("History Error")
+            mock_holdings.return_value = []
+
+            result = await client.fetch_portfolio_data({})
+
+            assert result["history"] == []
+            assert result["errors"] == ["history"]
+            assert result["summary"]["total_value"] == 100.0
+
+            await client.fetch_portfolio_data({})
+            assert mock_history.await_count == 2
+
     @pytest.mark.asyncio
     async def test_fetch_portfolio_data_error_handling(self, client):
         """Test error handling in portfolio data fetching"""
@@ -116,7 +264,7 @@ class TestWealthfolioClient:
             result = await client.get_holding_item("acc1", "AAPL")
 
             assert result == mock_response
-            mock_request.assert_called_once_with("/holdings/item", {"accountId": "acc1", "assetId": "AAPL"})
+            mock_request.assert_called_once_with("/holdings/item", (("accountId", "acc1"), ("assetId", "AAPL")))
 
     @pytest.mark.asyncio
     async def test_get_holding_item_not_found(self, client):
@@ -129,7 +277,73 @@ class TestWealthfolioClient:
             result = await client.get_holding_item("acc1", "INVALID")
 
             assert result is None
-            mock_request.assert_called_once_with("/holdings/item", {"accountId": "acc1", "assetId": "INVALID"})
+            mock_request.assert_called_once_with("/holdings/item", (("accountId", "acc1"), ("assetId", "INVALID")))
+
+    @pytest.mark.asyncio
+    async def test_get_holding_item_cached_including_misses(self, client):
+        """Test repeat lookups, including 404s, are served from the holding cache"""
+        with patch.object(client, '_make_request', new_callable=AsyncMock) as mock_request:
+            mock_request.side_effect = httpx.HTTPStatusError(
+                "Not Found", request=None, response=httpx.Response(404)
+            )
+
+            assert await client.get_holding_item("acc1", "INVALID") is None
+            assert await client.get_holding_item("acc1", "INVALID") is None
+            assert mock_request.call_count == 1
+
+            await client.invalidate_cache()
+            await client.get_holding_item("acc1", "INVALID")
+            assert mock_request.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_refresh_portfolio_keeps_warm_response(self, client):
+        """Test the refresh loop publishes complete results and drops partial ones"""
+        complete = {"errors": [], "summary": {"total_value": 1.0}}
+        partial = {"errors": ["holdings"], "summary": {"total_value": 0.0}}
+
+        with patch.object(client, '_fetch_portfolio_data', new_callable=AsyncMock) as mock_fetch, \
+             patch('src.api_client.asyncio.sleep', new_callable=AsyncMock) as mock_sleep:
+            mock_fetch.side_effect = [complete, partial]
+            mock_sleep.side_effect = [None, asyncio.CancelledError()]
+
+            refresh = asyncio.ensure_future(client.refresh_portfolio({"assets": []}, 20))
+            with pytest.raises(asyncio.CancelledError):
+                await refresh
+
+        assert client.warm_portfolio is None
+        mock_sleep.assert_awaited_with(20)
+
+        with patch.object(client, '_fetch_portfolio_data', new_callable=AsyncMock) as mock_fetch, \
+             patch('src.api_client.asyncio.sleep', new_callable=AsyncMock) as mock_sleep:
+            mock_fetch.return_value = complete
+            mock_sleep.side_effect = asyncio.CancelledError()
+
+            with pytest.raises(asyncio.CancelledError):
+                await client.refresh_portfolio({"assets": []}, 20)
+
+        assert client.warm_portfolio == complete
+        assert client.get_warm_portfolio(max_age=40) == complete
+        client.warm_portfolio_at -= 41
+        assert client.get_warm_portfolio(max_age=40) is None
+        await client.invalidate_cache()
+        assert client.warm_portfolio is None
+
+    @pytest.mark.asyncio
+    async def test_get_holding_item_coalesces_concurrent_lookups(self, client):
+        """Test concurrent lookups of one holding share a single upstream request"""
+        release = asyncio.Event()
+
+        async def not_found(endpoint, params):
+            await release.wait()
+            raise httpx.HTTPStatusError("Not Found", request=None, response=httpx.Response(404))
+
+        with patch.object(client, '_make_request', side_effect=not_found) as mock_request:
+            calls = [asyncio.ensure_future(client.get_holding_item("acc1", "AAPL")) for _ in range(5)]
+            await asyncio.sleep(0)
+            release.set()
+
+            assert await asyncio.gather(*calls) == [None] * 5
+            assert mock_request.call_count == 1
 
     @pytest.mark.asyncio
     async def test_get_holdings_bulk_success(self, client):
@@ -194,8 +408,278 @@ class TestWealthfolioClient:
             # Should call get_holding_item for AAPL only (CASH and FOREX filtered out)
             mock_get_holding.assert_called_once_with("acc1", "AAPL")
 
+            # The same (cached) assets list reuses its filtered IDs
+            tradable_ids = client._tradable_ids[1]
+            await client.get_holdings(account_ids)
+            assert client._tradable_ids[1] is tradable_ids
+
+    @pytest.mark.asyncio
+    async def test_get_holdings_fallback_bounded_concurrency(self, client):
+        """Test the per-item fallback never exceeds its concurrency limit"""
+        in_flight = 0
+        peak = 0
+
+        async def get_holding(account_id, asset_id):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0)
+            in_flight -= 1
+            return {"accountId": account_id, "assetId": asset_id}
+
+        with patch.object(client, '_make_request', new_callable=AsyncMock) as mock_request, \
+             patch.object(client, 'get_assets', new_callable=AsyncMock) as mock_get_assets, \
+             patch.object(client, 'get_holding_item', side_effect=get_holding):
+
+            mock_request.side_effect = httpx.HTTPStatusError(
+                "Not Found", request=None, response=httpx.Response(404)
+            )
+            mock_get_assets.return_value = [{"id": f"A{i}", "type": "stock"} for i in range(30)]
+
+            result = await client.get_holdings(["acc1"])
+
+            assert len(result) == 30
+            assert peak == settings.HOLDINGS_FALLBACK_CONCURRENCY
+
     @pytest.mark.asyncio
     async def test_get_holdings_empty_accounts(self, client):
         """Test get_holdings with empty account list"""
         result = await client.get_holdings([])
-        assert result == []
\ No newline at end of file
+        assert result == []
+
+    @pytest.mark.asyncio
+    async def test_make_request_reuses_shared_client(self, client):
+        """Test requests go through the pooled client against the base URL"""
+        seen = []
+
+        def handler(request):
+            seen.append(request.url.path)
+            return httpx.Response(200, json=[{"id": "acc1"}])
+
+        client._client = httpx.AsyncClient(
+            base_url=client.base_url, transport=httpx.MockTransport(handler)
+        )
+        pooled = client._client
+
+        assert await client._make_request("/accounts") == [{"id": "acc1"}]
+        assert await client._make_request("/assets") == [{"id": "acc1"}]
+        assert client._client is pooled
+        assert seen == ["/api/v1/accounts", "/api/v1/assets"]
+
+        await client.aclose()
+        assert pooled.is_closed
+
+    @pytest.mark.asyncio
+    async def test_make_request_raises_http_errors(self, client):
+        """Test upstream error statuses surface as HTTPStatusError with a readable body"""
+        client._client = httpx.AsyncClient(
+            base_url=client.base_url,
+            transport=httpx.MockTransport(lambda request: httpx.Response(404, text="missing")),
+        )
+
+        with pytest.raises(httpx.HTTPStatusError) as excinfo:
+            await client._make_request("/holdings")
+
+        assert excinfo.value.response.status_code == 404
+        assert excinfo.value.response.text == "missing"
+
+    @pytest.mark.asyncio
+    async def test_make_request_raises_for_unread_redirect(self, client):
+        """Test a streamed redirect is read before raising so its status and body survive"""
+        client._client = httpx.AsyncClient(
+            base_url=client.base_url,
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(
+                    302, headers={"Location": "/login"}, stream=httpx.ByteStream(b"moved")
+                )
+            ),
+        )
+
+        with pytest.raises(httpx.HTTPStatusError) as excinfo:
+            await client._make_request("/accounts")
+
+        assert excinfo.value.response.status_code == 302
+        assert excinfo.value.response.text == "moved"
+
+    @pytest.mark.asyncio
+    async def test_make_request_revalidates_with_etag(self, client):
+        """Test a remembered ETag is sent back and a 304 reuses the cached body"""
+        seen = []
+
+        def handler(request):
+            seen.append(request.headers.get("If-None-Match"))
+            if request.headers.get("If-None-Match") == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(200, json=[{"id": "acc1"}], headers={"ETag": '"v1"'})
+
+        client._client = httpx.AsyncClient(
+            base_url=client.base_url, transport=httpx.MockTransport(handler)
+        )
+
+        first = await client._make_request("/accounts", cache_key="accounts")
+        second = await client._make_request("/accounts", cache_key="accounts")
+
+        assert first == second == [{"id": "acc1"}]
+        assert seen == [None, '"v1"']
+
+    @pytest.mark.asyncio
+    async def test_get_accounts_cached(self, client):
+        """Test accounts are served from cache until invalidated"""
+        with patch.object(client, '_make_request', new_callable=AsyncMock) as mock_request:
+            mock_request.return_value = [{"id": "acc1"}]
+
+            assert await client.get_accounts() == [{"id": "acc1"}]
+            assert await client.get_accounts() == [{"id": "acc1"}]
+            assert mock_request.call_count == 1
+
+            await client.invalidate_cache()
+            await client.get_accounts()
+            assert mock_request.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_get_accounts_shared_between_clients(self, client, fake_redis):
+        """Test a second worker's client reuses accounts cached in Redis and /sync reaches both"""
+        shared = RedisCache(fake_redis)
+        other = WealthfolioClient(api_key="test_key")
+        client.shared_cache = other.shared_cache = shared
+
+        with patch.object(client, '_make_request', new_callable=AsyncMock) as mock_request, \
+             patch.object(other, '_make_request', new_callable=AsyncMock) as other_request:
+            mock_request.return_value = [{"id": "old"}]
+
+            assert await client.get_accounts() == [{"id": "old"}]
+            assert await other.get_accounts() == [{"id": "old"}]
+            other_request.assert_not_called()
+
+            await other.invalidate_cache()
+            mock_request.return_value = [{"id": "new"}]
+            # Within the check interval the first worker still serves its local copy
+            assert await client.get_accounts() == [{"id": "old"}]
+            client._generation_checked_at -= _GENERATION_CHECK_INTERVAL
+
+            # The first worker's in-process copy is dropped too, not just the Redis one
+            assert await client.get_accounts() == [{"id": "new"}]
+            assert mock_request.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_get_assets_interned_after_shared_cache_hit(self, client, fake_redis):
+        """Test rows served from Redis are interned too, not only freshly fetched ones"""
+        shared = RedisCache(fake_redis)
+        other = WealthfolioClient(api_key="test_key")
+        client.shared_cache = other.shared_cache = shared
+
+        with patch.object(client, '_make_request', new_callable=AsyncMock) as mock_request:
+            mock_request.return_value = [{"id": f"A{i}", "type": "".join(["EQU", "ITY"])} for i in range(3)]
+            await client.get_assets()
+
+        with patch.object(other, '_make_request', new_callable=AsyncMock) as other_request:
+            assets = await other.get_assets()
+
+        other_request.assert_not_called()
+        assert assets[0]["type"] is assets[1]["type"] is assets[2]["type"]
+
+    @pytest.mark.asyncio
+    async def test_response_cache_is_bounded(self, client):
+        """Test caller-controlled arguments can't grow the response cache without limit"""
+        with patch.object(client, '_make_request', new_callable=AsyncMock) as mock_request:
+            mock_request.return_value = []
+
+            for days in range(client._cache.maxsize + 50):
+                await client.get_valuation_history(days=days)
+
+        assert len(client._cache._entries) == client._cache.maxsize
+
+    @pytest.mark.asyncio
+    async def test_first_shared_generation_check_keeps_local_caches(self, client, fake_redis):
+        """Test the first generation seen is recorded without discarding in-flight work"""
+        client.shared_cache = RedisCache(fake_redis)
+        await client.shared_cache.invalidate()
+        client._cache.set("accounts", [{"id": "acc1"}], 30)
+        portfolio_generation = client._portfolio_cache.generation
+
+        await client.sync_shared_cache()
+
+        assert client._shared_generation == 1
+        assert client._cache.get("accounts") == [{"id": "acc1"}]
+        assert client._portfolio_cache.generation == portfolio_generation
+
+    @pytest.mark.asyncio
+    async def test_shared_generation_checked_at_most_once_per_interval(self, client, fake_redis):
+        """Test cached calls don't each add a Redis round trip for the generation"""
+        client.shared_cache = RedisCache(fake_redis)
+
+        with patch.object(client.shared_cache, 'generation', new_callable=AsyncMock) as mock_generation, \
+             patch.object(client, '_make_request', new_callable=AsyncMock) as mock_request:
+            mock_generation.return_value = 0
+            mock_request.return_value = []
+
+            await asyncio.gather(client.get_accounts(), client.get_assets(), client.get_valuation_history())
+            await client.get_holding_item("acc1", "AAPL")
+
+        assert mock_generation.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_get_valuation_history_cached_per_arguments(self, client):
+        """Test history cache is keyed on account and day range"""
+        with patch.object(client, '_make_request', new_callable=AsyncMock) as mock_request:
+            mock_request.return_value = []
+
+            await client.get_valuation_history()
+            await client.get_valuation_history(account_id="TOTAL", days=30)
+            await client.get_valuation_history(days=7)
+
+            assert mock_request.call_count == 2
+
+
+def test_compute_totals_single_pass():
+    """Test totals treat missing and null fields as zero"""
+    valuations = [
+        {"totalValue": 100.0, "costBasis": 80.0, "netContribution": 50.0},
+        {"totalValue": 20.0, "costBasis": None},
+        {},
+    ]
+
+    assert _compute_totals(valuations) == Totals(value=120.0, cost=80.0, contribution=50.0)
+    assert _compute_totals([]) == Totals(0.0, 0.0, 0.0)
+
+
+def test_compute_totals_numpy_matches_loop():
+    """Test the vectorized reduction used for large portfolios matches the loop"""
+    valuations = [{"totalValue": 10.5, "costBasis": 9.0, "netContribution": None}] * 1500
+
+    totals = _compute_totals_numpy(valuations)
+
+    assert totals.value == pytest.approx(15750.0)
+    assert totals.cost == pytest.approx(13500.0)
+    assert totals.contribution == 0.0
+    assert _compute_totals(valuations) == totals
+
+
+def test_intern_fields_shares_repeated_strings():
+    """Test repeated field values end up as one shared string object"""
+    rows = [{"accountId": "".join(["acc", "1"]), "currency": None, "totalValue": 1.0} for _ in range(3)]
+
+    assert _intern_fields(rows, ("accountId", "currency")) is rows
+    assert rows[0]["accountId"] is rows[1]["accountId"] is rows[2]["accountId"]
+    assert rows[0]["currency"] is None
+    assert _intern_fields([{}], ("currency",)) == [{}]
+
+
+def test_intern_fields_passes_through_non_row_bodies():
+    """Test error objects and non-dict rows from upstream are returned untouched"""
+    assert _intern_fields({"error": "x"}, ("id",)) == {"error": "x"}
+    assert _intern_fields(["AAPL", None, {"id": "AAPL"}], ("id",)) == ["AAPL", None, {"id": "AAPL"}]
+
+
+def test_history_params_reused_within_day():
+    """Test history params are built once per day, account and range"""
+    params = _history_params("TOTAL", 30)
+    today = date.today()
+
+    assert params == {
+        "accountId": "TOTAL",
+        "startDate": (today - timedelta(days=30)).isoformat(),
+        "endDate": today.isoformat(),
+    }
+    assert _history_params("TOTAL", 30) is params
+    assert _history_params("TOTAL", 7) is not params
@@ -0,0 +1,136 @@
+import asyncio
+import time
+import pytest
+import redis.asyncio as redis
+from unittest.mock import AsyncMock
+from src.cache import RedisCache, TTLCache
+
+
+class TestTTLCache:
+    """Test cases for the in-process TTL cache"""
+
+    def test_evicts_least_recently_used(self):
+        """Test a bounded cache drops the least recently used entry"""
+        cache = TTLCache(maxsize=2)
+        cache.set("a", 1, 30)
+        cache.set("b", 2, 30)
+        cache.get("a")
+        cache.set("c", 3, 30)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    @pytest.mark.asyncio
+    async def test_get_or_load_ttl_callable(self):
+        """Test ttl can depend on the loaded value"""
+        cache = TTLCache()
+
+        await cache.get_or_load("miss", lambda value: 0 if value is None else 30, AsyncMock(return_value=None))
+        await cache.get_or_load("hit", lambda value: 0 if value is None else 30, AsyncMock(return_value=1))
+
+        assert cache.get("miss", "expired") == "expired"
+        assert cache.get("hit") == 1
+
+
+class TestRedisCache:
+    """Test cases for the shared Redis cache"""
+
+    @pytest.mark.asyncio
+    async def test_get_or_load_stores_and_reuses_value(self, fake_redis):
+        """Test a miss loads once and later calls are served from Redis"""
+        cache = RedisCache(fake_redis)
+        loader = AsyncMock(return_value={"summary": {"total_value": 1.0}})
+
+        assert await cache.get_or_load("portfolio:a", 30, loader) == {"summary": {"total_value": 1.0}}
+        assert await cache.get_or_load("portfolio:a", 30, loader) == {"summary": {"total_value": 1.0}}
+        assert loader.await_count == 1
+        assert "wf:0:portfolio:a" in cache.client.store
+        assert "wf:0:portfolio:a:lock" not in cache.client.store
+
+    @pytest.mark.asyncio
+    async def test_get_or_load_does_not_cache_errors(self, fake_redis):
+        """Test a failing loader releases the lock and stores nothing"""
+        cache = RedisCache(fake_redis)
+        loader = AsyncMock(side_effect=Exception("API Error"))
+
+        with pytest.raises(Exception):
+            await cache.get_or_load("portfolio:a", 30, loader)
+
+        assert cache.client.store == {}
+
+    @pytest.mark.asyncio
+    async def test_waiter_loads_once_lock_released_without_value(self, fake_redis):
+        """Test a waiter stops polling when the lock holder gives up without storing"""
+        cache = RedisCache(fake_redis, lock_wait=5.0)
+        fake_redis.store["wf:0:portfolio:a:lock"] = b"1"
+
+        async def holder_fails():
+            await asyncio.sleep(0.1)
+            await fake_redis.delete("wf:0:portfolio:a:lock")
+
+        release = asyncio.ensure_future(holder_fails())
+        started = time.monotonic()
+        assert await cache.get_or_load("portfolio:a", 30, AsyncMock(return_value=[])) == []
+        await release
+
+        assert time.monotonic() - started < 1.0
+
+    @pytest.mark.asyncio
+    async def test_get_or_load_falls_back_when_redis_is_down(self, fake_redis):
+        """Test Redis errors degrade to calling the loader directly"""
+        fake_redis.get = AsyncMock(side_effect=redis.ConnectionError("down"))
+        cache = RedisCache(fake_redis)
+        loader = AsyncMock(return_value=[])
+
+        assert await cache.get_or_load("portfolio:a", 30, loader) == []
+        assert loader.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_load_started_before_invalidate_is_not_served_after(self, fake_redis):
+        """Test a load in flight during /sync can't write pre-sync data back for every worker"""
+        worker_a, worker_b = RedisCache(fake_redis), RedisCache(fake_redis)
+        release = asyncio.Event()
+
+        async def slow_old_load():
+            await release.wait()
+            return [{"id": "old"}]
+
+        in_flight = asyncio.ensure_future(worker_a.get_or_load("get_accounts:x", 300, slow_old_load))
+        await asyncio.sleep(0)
+        await worker_b.invalidate()
+        release.set()
+        assert await in_flight == [{"id": "old"}]
+
+        # Worker A's next generation check picks up the invalidation
+        await worker_a.generation()
+        fresh_load = AsyncMock(return_value=[{"id": "new"}])
+
+        assert await worker_a.get_or_load("get_accounts:x", 300, fresh_load) == [{"id": "new"}]
+        assert await worker_b.get_or_load("get_accounts:x", 300, fresh_load) == [{"id": "new"}]
+        assert fresh_load.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_invalidate_clears_namespace_only(self, fake_redis):
+        """Test invalidation removes this cache's keys, leaves others alone and bumps the generation"""
+        cache = RedisCache(fake_redis)
+        cache.client.store["other:key"] = b"1"
+        await cache.get_or_load("get_accounts:a", 30, AsyncMock(return_value=[{"id": "acc1"}]))
+
+        assert await cache.generation() == 0
+        assert await cache.invalidate() == 1
+
+        assert cache.client.store == {"other:key": b"1", "wf.generation": b"1"}
+        assert await cache.generation() == 1
+
+    def test_from_url_sets_socket_timeouts(self):
+        """Test a stalled Redis can't hang callers indefinitely"""
+        cache = RedisCache.from_url("redis://localhost:6379/0", timeout=0.25)
+        kwargs = cache.client.connection_pool.connection_kwargs
+
+        assert kwargs["socket_timeout"] == 0.25
+        assert kwargs["socket_connect_timeout"] == 0.25
+
+    def test_make_key_is_order_independent(self):
+        """Test keys are stable regardless of filter ordering"""
+        assert RedisCache.make_key("portfolio", {"a": 1, "b": 2}) == RedisCache.make_key("portfolio", {"b": 2, "a": 1})
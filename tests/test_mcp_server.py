@@ -0,0 +1,169 @@
+import httpx
+import pytest
+import time
+from unittest.mock import AsyncMock, patch
+from fastapi.testclient import TestClient
+from config.settings import settings
+from src.mcp_server import DEFAULT_PORTFOLIO_FILTERS, OPENAPI_ETAG, app, build_openapi_schema
+
+
+@pytest.fixture(autouse=True)
+def no_portfolio_refresh():
+    """Keep the lifespan from starting the background portfolio refresh against the real API"""
+    with patch.object(settings, "PORTFOLIO_REFRESH_INTERVAL", 0):
+        yield
+
+
+class TestOpenAPISchema:
+    """Test cases for the prebuilt OpenAPI schema"""
+
+    def test_schema_prebuilt_at_import(self):
+        """Test the schema exists before any request and app.openapi() reuses it"""
+        schema = app.openapi_schema
+
+        assert schema is not None
+        assert app.openapi() is schema
+
+    def test_schema_includes_parameter_overrides(self):
+        """Test the prebuilt schema matches a fresh build, including UUID guidance"""
+        schema = app.openapi()
+        parameters = {
+            param["name"]: param
+            for param in schema["paths"]["/holdings/item"]["get"]["parameters"]
+        }
+
+        assert schema == build_openapi_schema()
+        assert schema["info"]["x-logo"]["url"] == "https://wealthfolio.io/assets/logo.png"
+        assert parameters["account_id"]["schema"]["format"] == "uuid"
+        assert parameters["asset_id"]["example"] == "VHYL.GB"
+
+    def test_openapi_json_served_with_etag(self):
+        """Test /openapi.json is cacheable and revalidates to 304 on a matching ETag"""
+        with TestClient(app) as http:
+            response = http.get("/openapi.json")
+            revalidated = http.get("/openapi.json", headers={"If-None-Match": OPENAPI_ETAG})
+            docs = http.get("/docs")
+            redoc = http.get("/redoc")
+            oauth2_redirect = http.get("/docs/oauth2-redirect")
+
+        assert response.status_code == 200
+        assert response.json() == app.openapi_schema
+        assert response.headers["cache-control"] == "public, max-age=3600"
+        assert response.headers["etag"] == OPENAPI_ETAG
+        assert revalidated.status_code == 304
+        assert revalidated.content == b""
+        assert docs.status_code == 200
+        assert "/openapi.json" in docs.text
+        assert redoc.status_code == 200
+        assert "/openapi.json" in redoc.text
+        assert oauth2_redirect.status_code == 200
+
+
+class TestEndpoints:
+    """Test cases for the MCP server endpoints"""
+
+    def test_portfolio_returns_client_data(self):
+        """Test /portfolio passes the aggregated client data through as JSON"""
+        portfolio = {"accounts": [{"id": "acc1"}], "summary": {"total_value": 1.5}}
+
+        with TestClient(app) as http:
+            app.state.client.fetch_portfolio_data = AsyncMock(return_value=portfolio)
+            response = http.get("/portfolio")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert response.json() == portfolio
+        app.state.client.fetch_portfolio_data.assert_awaited_once_with(filters=DEFAULT_PORTFOLIO_FILTERS)
+
+    def test_portfolio_serves_warm_response(self):
+        """Test /portfolio returns the background-refreshed response without a live fetch"""
+        portfolio = {"accounts": [], "errors": [], "summary": {"total_value": 2.0}}
+
+        with TestClient(app) as http, patch.object(settings, "PORTFOLIO_REFRESH_INTERVAL", 20):
+            app.state.client.warm_portfolio = portfolio
+            app.state.client.warm_portfolio_at = time.monotonic()
+            app.state.client.fetch_portfolio_data = AsyncMock()
+            response = http.get("/portfolio")
+
+        assert response.json() == portfolio
+        app.state.client.fetch_portfolio_data.assert_not_awaited()
+
+    def test_portfolio_ignores_stale_warm_response(self):
+        """Test a warm copy older than two refresh intervals falls back to a live fetch"""
+        live = {"accounts": [], "errors": [], "summary": {"total_value": 3.0}}
+
+        with TestClient(app) as http, patch.object(settings, "PORTFOLIO_REFRESH_INTERVAL", 20):
+            app.state.client.warm_portfolio = {"errors": [], "summary": {"total_value": 2.0}}
+            app.state.client.warm_portfolio_at = time.monotonic() - 41
+            app.state.client.fetch_portfolio_data = AsyncMock(return_value=live)
+            response = http.get("/portfolio")
+
+        assert response.json() == live
+        app.state.client.fetch_portfolio_data.assert_awaited_once()
+
+    def test_holding_item_not_found_returns_404(self):
+        """Test a missing holding surfaces as 404 rather than being wrapped in a 500"""
+        with TestClient(app) as http:
+            app.state.client.get_holding_item = AsyncMock(return_value=None)
+            response = http.get("/holdings/item", params={"account_id": "acc1", "asset_id": "AAPL"})
+
+        assert response.status_code == 404
+        assert response.json() == {"detail": "Holding item not found"}
+
+    def test_upstream_status_error_is_relayed(self):
+        """Test an upstream HTTP error keeps its status and a truncated body"""
+        upstream = httpx.Response(401, text="x" * 500, request=httpx.Request("GET", "http://upstream/accounts"))
+
+        with TestClient(app) as http:
+            app.state.client.get_accounts = AsyncMock(
+                side_effect=httpx.HTTPStatusError("Unauthorized", request=upstream.request, response=upstream)
+            )
+            response = http.get("/accounts")
+
+        assert response.status_code == 401
+        assert response.json() == {"detail": "x" * 200}
+
+    def test_upstream_redirect_returns_502(self):
+        """Test a non-error upstream status (e.g. an auth redirect) isn't relayed to clients"""
+        upstream = httpx.Response(302, text="moved", request=httpx.Request("GET", "http://upstream/accounts"))
+
+        with TestClient(app) as http:
+            app.state.client.get_accounts = AsyncMock(
+                side_effect=httpx.HTTPStatusError("Found", request=upstream.request, response=upstream)
+            )
+            response = http.get("/accounts", follow_redirects=False)
+
+        assert response.status_code == 502
+        assert response.json() == {"detail": "Unexpected upstream status 302"}
+
+    def test_upstream_unreachable_returns_502(self):
+        """Test connection failures to Wealthfolio map to 502 Bad Gateway"""
+        with TestClient(app) as http:
+            app.state.client.get_assets = AsyncMock(side_effect=httpx.ConnectError("refused"))
+            response = http.get("/assets")
+
+        assert response.status_code == 502
+        assert response.json()["detail"].startswith("Upstream unreachable")
+
+    def test_large_responses_are_gzipped(self):
+        """Test responses over the size threshold are compressed for gzip-aware clients"""
+        assets = [{"id": f"ASSET{i}", "type": "EQUITY"} for i in range(100)]
+
+        with TestClient(app) as http:
+            app.state.client.get_assets = AsyncMock(return_value=assets)
+            response = http.get("/assets", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.json() == assets
+
+    def test_healthz_reports_free_upstream_slots(self):
+        """Test /healthz reports the upstream concurrency limit and free slots"""
+        with TestClient(app) as http:
+            response = http.get("/healthz")
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "status": "ok",
+            "upstream_slots_available": settings.upstream_concurrency,
+            "upstream_slots": settings.upstream_concurrency,
+        }
@@ -0,0 +1,29 @@
+from config.settings import Settings
+
+
+class TestSettings:
+    """Test cases for application settings"""
+
+    def test_asset_filters_list_parses_json_once(self):
+        """Test JSON asset filters are parsed and cached"""
+        settings = Settings(asset_filters='["stocks", "crypto"]')
+
+        assert settings.asset_filters_list == ["stocks", "crypto"]
+        assert settings.asset_filters_list is settings.asset_filters_list
+
+    def test_asset_filters_list_accepts_comma_separated(self):
+        """Test the comma-separated form from .env.example"""
+        assert Settings(asset_filters="stocks, crypto").asset_filters_list == ["stocks", "crypto"]
+        assert Settings(asset_filters=None).asset_filters_list == []
+
+    def test_upstream_concurrency_defaults_to_pool_size(self):
+        """Test the upstream limit follows the connection pool unless set"""
+        assert Settings(HTTP_MAX_CONNECTIONS=10).upstream_concurrency == 10
+        assert Settings(HTTP_MAX_CONNECTIONS=10, MAX_UPSTREAM_CONCURRENCY=20).upstream_concurrency == 20
+
+    def test_upstream_concurrency_capped_without_http2(self):
+        """Test the limit never exceeds the pool when requests can't be multiplexed"""
+        assert Settings(HTTP2=False, HTTP_MAX_CONNECTIONS=10, MAX_UPSTREAM_CONCURRENCY=20).upstream_concurrency == 10
+        assert Settings(
+            API_BASE_URL="http://wealthfolio:8080/api/v1", HTTP_MAX_CONNECTIONS=10, MAX_UPSTREAM_CONCURRENCY=20
+        ).upstream_concurrency == 10